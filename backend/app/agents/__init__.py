@@ -1 +1,3 @@
- 
\ No newline at end of file
+# The compiled agent graph and its tools live in graph.py; re-export them so
+# every entry point shares the single instance built at import.
+from .graph import graph, tools, tool_dict, GraphState
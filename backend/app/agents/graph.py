@@ -1,10 +1,14 @@
 import os
-import json
 import re
+import asyncio
+import orjson
 from typing import TypedDict, List, Dict, Any, Optional, Union
 from langchain.agents import Tool
 from langchain.tools import StructuredTool
+from langchain_core.messages import BaseMessage
+from langchain_core.prompts import ChatPromptTemplate
 from langgraph.graph import StateGraph, END
+from langgraph.config import get_stream_writer
 from app.tools.financial_api import get_financial_data
 from app.tools.news_api import get_news_articles
 from app.tools.web_scraper import scrape_website
@@ -16,6 +20,13 @@ import logging
 
 vector_store = VectorStore()
 
+# Cleanup patterns for LLM output, compiled once at import
+_RE_NL = re.compile(r"\n{3,}")
+_RE_WS = re.compile(r"[ \t]{2,}")
+_RE_STAR = re.compile(r"(\*+)[ \t]+")
+_RE_HEADING = re.compile(r'^(#+ .+)(?!\n\n)(\n)([^\n#])', re.MULTILINE)
+_RE_FENCE = re.compile(r"^```(?:json)?|```$", re.IGNORECASE | re.MULTILINE)
+
 def search_internal_documents(query: str) -> Dict[str, Any]:
     try:
         results = vector_store.search(index_name="research_docs", query=query)
@@ -50,12 +61,10 @@ class AnalystOutput(BaseModel):
     narrative: str
 
 def extract_json_from_string(s: str) -> Optional[Any]:
-    import json
-    import re
     logger = logging.getLogger("multiagent")
 
     s = s.strip()
-    s = re.sub(r"^```(?:json)?|```$", "", s, flags=re.IGNORECASE | re.MULTILINE).strip()
+    s = _RE_FENCE.sub("", s).strip()
     # Remove leading 'content=' and any leading/trailing quotes
     if s.startswith("content="):
         s = s[len("content="):].strip()
@@ -70,10 +79,10 @@ def extract_json_from_string(s: str) -> Optional[Any]:
         if (json_str.startswith("'") and json_str.endswith("'")) or (json_str.startswith('"') and json_str.endswith('"')):
             json_str = json_str[1:-1]
         try:
-            data = json.loads(json_str)
+            data = orjson.loads(json_str)
             try:
-                validated = AnalystOutput(**data)
-                return validated.dict()
+                validated = AnalystOutput.model_validate(data)
+                return validated.model_dump()
             except ValidationError as ve:
                 logger.warning(f"Analyst output JSON is missing required fields or is malformed: {ve}")
                 partial = {k: data.get(k, None) for k in ["key_insights", "comparative_analysis", "narrative"]}
@@ -87,21 +96,78 @@ def extract_json_from_string(s: str) -> Optional[Any]:
         logger.error(f"Could not find a valid JSON object in the output. Raw: {s}")
         return {"error": "Could not find a valid JSON object in the output.", "raw_output": s}
 
-def safe_invoke_llm(prompt_str: str, preferred_provider: Optional[str] = None) -> Union[str, Dict[str, Any]]:
+# Prompt templates are built once; node outputs are joined as plain text rather than
+# interpolating the Python list repr, which inflates the prompt with quotes and escapes.
+_ANALYST_TEMPLATE = (
+    "You are a financial analyst. Analyze the following research data and write only the {section} section "
+    "of your analysis in clean, well-formatted Markdown.\n"
+    "{instructions}\n"
+    "Do not include a section heading, code blocks, JSON, or extra metadata.\n"
+    "Research Data:\n{research}"
+).format
+_ANALYST_SECTIONS = (
+    ("Key Insights", "List the most important insights as concise bullet points."),
+    ("Comparative Analysis", "Compare the companies, products, or options covered by the research."),
+    ("Narrative", "Summarize the overall story the data tells in a few short paragraphs."),
+)
+# The static instructions travel as a system message built once; only the
+# analysis and research text vary per call.
+_REPORT_PROMPT = ChatPromptTemplate.from_messages([
+    ("system",
+     "You are a report writer. Using the analysis and research data you are given, generate a professional report in clean Markdown.\n"
+     "Your report must include: Executive Summary, Key Findings, Comparative Analysis, and Conclusion.\n"
+     "Avoid extra spacing, repeated sections, unnecessary indentation, or tool output. Return plain Markdown.\n"
+     "Keep the formatting consistent and clean. No code blocks, no triple backticks."),
+    ("human", "Analysis:\n{analysis}\n\nResearch Data:\n{research}"),
+])
+
+def _join_outputs(outputs: Any) -> str:
+    """Join a node's list of outputs into plain text for the next prompt."""
+    if isinstance(outputs, str):
+        return outputs
+    return "\n\n".join(str(x) for x in outputs or [])
+
+def normalize_markdown(text: str) -> str:
+    """Collapse blank-line runs, repeated spaces, and padding after emphasis markers."""
+    text = _RE_NL.sub("\n\n", text)
+    text = _RE_WS.sub(" ", text)
+    text = _RE_STAR.sub(r"\1 ", text)
+    return text.strip()
+
+async def safe_ainvoke_llm(prompt_str: str, preferred_provider: Optional[str] = None) -> Union[str, Dict[str, Any]]:
     try:
-        result = llm_manager.invoke_with_fallback(prompt_str, preferred_provider)
+        result = await llm_manager.ainvoke_with_fallback(prompt_str, preferred_provider)
         if result["success"]:
             response = result["response"]
-            # If response is a dict with 'content', extract it
+            # Chat models return message objects; callers only want the text
             if isinstance(response, dict) and "content" in response:
                 return response["content"]
+            if hasattr(response, "content"):
+                return response.content
             return response
         else:
             return {"error": result.get("error", "LLM invocation failed")}
     except Exception as e:
         return {"error": f"LLM invocation failed: {e}"}
 
-def agent_node_researcher(state: GraphState) -> Dict[str, Any]:
+async def safe_astream_llm(prompt_str: Union[str, List[BaseMessage]], node: str, preferred_provider: Optional[str] = None,
+                           cache_key: Optional[str] = None) -> Union[str, Dict[str, Any]]:
+    """
+    Stream an LLM response, forwarding each delta on the graph's custom stream,
+    and return the full text once the stream completes.
+    """
+    writer = get_stream_writer()
+    parts = []
+    try:
+        async for delta in llm_manager.astream_invoke(prompt_str, preferred_provider, cache_key):
+            parts.append(delta)
+            # Deltas are display-only; the full text gets the complete cleanup below
+            writer({"node": node, "delta": _RE_STAR.sub(r"\1 ", _RE_WS.sub(" ", delta))})
+    except Exception as e:
+        return {"error": f"LLM invocation failed: {e}"}
+    return "".join(parts)
+
+async def agent_node_researcher(state: GraphState) -> Dict[str, Any]:
     prompt = (
         f"You are a researcher tasked with collecting insights for this topic:\n\n"
         f"{state['task']}\n\n"
@@ -109,57 +175,43 @@ def agent_node_researcher(state: GraphState) -> Dict[str, Any]:
         "Avoid repeating your task or tool commands. Do not include code blocks or planning steps.\n"
         "Organize results into headings and bullet points. Avoid verbose filler."
     )
-    llm_response = safe_invoke_llm(prompt)
-    return {"research_data": [llm_response]} if not ("error" in str(llm_response)) else {"research_data": [llm_response]}
-
-def agent_node_analyst(state: GraphState) -> Dict[str, Any]:
-    prompt = (
-        "You are a financial analyst. Analyze the following research data and return your findings in clean, well-formatted Markdown.\n"
-        "Use the following sections as Markdown headings: Key Insights, Comparative Analysis, and Narrative.\n"
-        "Do not include code blocks, JSON, or extra metadata.\n"
-        "Organize your analysis clearly under each heading.\n"
-        f"Research Data:\n{state.get('research_data', '')}"
+    # The prompt is fixed text around the task, so the task alone keys the cache: the
+    # boilerplate would otherwise dominate the embedding and make different tasks look alike
+    llm_response = await safe_astream_llm(prompt, "researcher", cache_key=f"Research task: {state['task']}")
+    return {"research_data": [llm_response]}
+
+async def agent_node_analyst(state: GraphState) -> Dict[str, Any]:
+    # Each section is an independent prompt, so the three LLM round-trips run concurrently
+    # and the result is assembled locally instead of parsing a single JSON/Markdown blob.
+    research = _join_outputs(state.get('research_data', []))
+    insights, comp, narr = await asyncio.gather(*(
+        safe_ainvoke_llm(_ANALYST_TEMPLATE(section=section, instructions=instructions, research=research))
+        for section, instructions in _ANALYST_SECTIONS
+    ))
+    for llm_response in (insights, comp, narr):
+        if isinstance(llm_response, dict) and "error" in llm_response:
+            return {"analysis": [llm_response]}
+
+    analysis = (
+        f"## Key Insights\n\n{insights.strip()}\n\n"
+        f"## Comparative Analysis\n\n{comp.strip()}\n\n"
+        f"## Narrative\n\n{narr.strip()}"
     )
-    llm_response = safe_invoke_llm(prompt)
-    def clean_llm_output(text: str) -> str:
-        text = text.strip()
-        if text.startswith('content="') and text.endswith('"'):
-            text = text[len('content="'):-1]
-        elif text.startswith('content='):
-            text = text[len('content='):].strip()
-        return re.split(r"(?:additional_kwargs=|response_metadata=|id=')", text)[0].strip()
-    analysis = str(llm_response)
-    analysis = clean_llm_output(analysis)
-    analysis = re.sub(r"\n{3,}", "\n\n", analysis)
-    analysis = re.sub(r"[ \t]{2,}", " ", analysis)
-    analysis = re.sub(r"(\*+)[ \t]+", r"\1 ", analysis)
-    analysis = analysis.strip()
-    analysis = re.sub(r'^(#+ .+)(?!\n\n)(\n)([^\n#])', r'\1\n\n\3', analysis, flags=re.MULTILINE)
+    analysis = normalize_markdown(analysis)
+    analysis = _RE_HEADING.sub(r'\1\n\n\3', analysis)
     return {"analysis": [analysis]}
 
-def agent_node_report_writer(state: GraphState) -> Dict[str, Any]:
-    prompt = (
-        "You are a report writer. Using the following analysis and research data, generate a professional report in clean Markdown.\n"
-        "Your report must include: Executive Summary, Key Findings, Comparative Analysis, and Conclusion.\n"
-        "Avoid extra spacing, repeated sections, unnecessary indentation, or tool output. Return plain Markdown.\n"
-        "Keep the formatting consistent and clean. No code blocks, no triple backticks.\n"
-        f"Analysis:\n{state.get('analysis', '')}\n"
-        f"Research Data:\n{state.get('research_data', '')}"
+async def agent_node_report_writer(state: GraphState) -> Dict[str, Any]:
+    prompt = _REPORT_PROMPT.format_messages(
+        analysis=_join_outputs(state.get('analysis', [])),
+        research=_join_outputs(state.get('research_data', [])),
     )
-    llm_response = safe_invoke_llm(prompt)
+    llm_response = await safe_astream_llm(prompt, "report_writer")
 
     if isinstance(llm_response, dict) and "error" in llm_response:
         return {"report": [llm_response]}
 
-    def clean_llm_output(text: str) -> str:
-        return re.split(r"(?:additional_kwargs=|response_metadata=|id=')", text)[0].strip()
-
-    report = str(llm_response)
-    report = clean_llm_output(report)
-    report = re.sub(r"\n{3,}", "\n\n", report)     
-    report = re.sub(r"[ \t]{2,}", " ", report)     
-    report = re.sub(r"(\*+)[ \t]+", r"\1 ", report)
-    report = report.strip()
+    report = normalize_markdown(llm_response)
 
     return {"report": [report]}
 
@@ -0,0 +1,14 @@
+from functools import lru_cache
+
+from pydantic_settings import BaseSettings, SettingsConfigDict
+
+class Settings(BaseSettings):
+    """Application settings, read from the environment and .env."""
+    model_config = SettingsConfigDict(env_file=".env", extra="ignore", frozen=True)
+
+    OPENAI_API_KEY: str = ""
+
+@lru_cache
+def get_settings() -> Settings:
+    """The process-wide Settings, built (and validated) once; usable as a FastAPI dependency."""
+    return Settings()
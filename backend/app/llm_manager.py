@@ -1,10 +1,22 @@
 import os
-from typing import Optional, Dict, Any
+import time
+import asyncio
+import threading
+from typing import Optional, Dict, Any, AsyncIterator, List, Union
+from langchain_core.messages import AIMessage, BaseMessage, get_buffer_string
 from langchain_google_genai import ChatGoogleGenerativeAI
 from dotenv import load_dotenv
+from app.utils.semantic_cache import SemanticCache
 
 load_dotenv()
 
+# Consecutive failures before a provider is skipped, and for how long
+BREAKER_THRESHOLD = 3
+BREAKER_COOLDOWN_SECONDS = 30.0
+
+# How long a cached LLM response may be reused
+CACHE_TTL_SECONDS = 3600.0
+
 class LLMManager:
     """
     Manages LLM providers.
@@ -14,7 +26,17 @@ class LLMManager:
     def __init__(self, default_provider: str = "gemini"):
         self.default_provider = default_provider
         self.providers = {}
+        # Set DISABLE_LLM_CACHE=1 to always hit the providers (e.g. when testing)
+        self.cache: Optional[SemanticCache] = None
+        if os.getenv("DISABLE_LLM_CACHE", "").lower() not in ("1", "true", "yes"):
+            self.cache = SemanticCache(threshold=0.97, max_entries=10000, ttl=CACHE_TTL_SECONDS)
         self._initialize_providers()
+        self._fallback_order: tuple[str, ...] = tuple(self.providers.keys())
+        self._breaker: Dict[str, Dict[str, float]] = {
+            provider: {"fails": 0, "open_until": 0.0} for provider in self.providers
+        }
+        # The sync path runs in worker threads, so breaker updates are serialized
+        self._breaker_lock = threading.Lock()
     
     def _initialize_providers(self):
         """Initialize available LLM providers based on environment variables."""
@@ -69,31 +91,110 @@ class LLMManager:
         """Get list of available provider names."""
         return list(self.providers.keys())
     
-    def invoke_with_fallback(self, prompt: str, preferred_provider: Optional[str] = None) -> Dict[str, Any]:
+    def _providers_to_try(self, preferred_provider: Optional[str] = None) -> List[str]:
+        """Preferred provider first, then the fixed fallback order, skipping open circuit breakers."""
+        now = time.monotonic()
+        order = self._fallback_order
+        if preferred_provider in self.providers:
+            order = (preferred_provider,) + tuple(p for p in order if p != preferred_provider)
+        return [p for p in order if now >= self._breaker[p]["open_until"]]
+    
+    def _record_failure(self, provider: str) -> None:
+        """Count a failure and open the provider's breaker once the threshold is reached."""
+        with self._breaker_lock:
+            breaker = self._breaker[provider]
+            breaker["fails"] += 1
+            # The count is kept when the breaker opens (half-open): after the cooldown a
+            # single failed probe reopens it instead of costing another full threshold
+            if breaker["fails"] >= BREAKER_THRESHOLD:
+                breaker["open_until"] = time.monotonic() + BREAKER_COOLDOWN_SECONDS
+    
+    def _record_success(self, provider: str) -> None:
+        """Reset the provider's consecutive failure count, closing its breaker."""
+        with self._breaker_lock:
+            self._breaker[provider]["fails"] = 0
+    
+    def invoke_with_fallback(self, prompt: str, preferred_provider: Optional[str] = None,
+                             cache_key: Optional[str] = None) -> Dict[str, Any]:
         """
         Invoke LLM with automatic fallback if the preferred provider fails.
         
         Args:
             prompt: The prompt to send to the LLM
             preferred_provider: Preferred provider name
+            cache_key: Short text that determines the prompt (e.g. the task); when given,
+                the cache matches on it semantically, otherwise only exact prompts match
             
         Returns:
             Dict with response and provider used
         """
-        providers_to_try = []
+        key = cache_key if cache_key is not None else prompt
+        if self.cache is not None:
+            cached = self.cache.get(key, semantic=cache_key is not None)
+            if cached is not None:
+                return {
+                    "response": cached["response"],
+                    "provider": cached["provider"],
+                    "success": True,
+                    "cached": True
+                }
         
-        if preferred_provider and preferred_provider in self.providers:
-            providers_to_try.append(preferred_provider)
+        for provider in self._providers_to_try(preferred_provider):
+            try:
+                llm = self.providers[provider]
+                response = llm.invoke(prompt)
+                self._record_success(provider)
+                if self.cache is not None:
+                    self.cache.put(key, {"response": response, "provider": provider}, semantic=cache_key is not None)
+                return {
+                    "response": response,
+                    "provider": provider,
+                    "success": True
+                }
+            except Exception as e:
+                print(f"Provider {provider} failed: {e}")
+                self._record_failure(provider)
+                continue
         
-        # Add other providers as fallbacks
-        for provider in self.providers:
-            if provider not in providers_to_try:
-                providers_to_try.append(provider)
+        return {
+            "response": "All LLM providers failed",
+            "provider": None,
+            "success": False,
+            "error": "No available LLM providers"
+        }
+
+    async def ainvoke_with_fallback(self, prompt: str, preferred_provider: Optional[str] = None,
+                                    cache_key: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Async variant of invoke_with_fallback using the providers' native ainvoke.
         
-        for provider in providers_to_try:
+        Args:
+            prompt: The prompt to send to the LLM
+            preferred_provider: Preferred provider name
+            cache_key: Short text that determines the prompt (e.g. the task); when given,
+                the cache matches on it semantically, otherwise only exact prompts match
+            
+        Returns:
+            Dict with response and provider used
+        """
+        key = cache_key if cache_key is not None else prompt
+        if self.cache is not None:
+            cached = await asyncio.to_thread(self.cache.get, key, cache_key is not None)
+            if cached is not None:
+                return {
+                    "response": cached["response"],
+                    "provider": cached["provider"],
+                    "success": True,
+                    "cached": True
+                }
+        
+        for provider in self._providers_to_try(preferred_provider):
             try:
                 llm = self.providers[provider]
-                response = llm.invoke(prompt)
+                response = await llm.ainvoke(prompt)
+                self._record_success(provider)
+                if self.cache is not None:
+                    await asyncio.to_thread(self.cache.put, key, {"response": response, "provider": provider}, cache_key is not None)
                 return {
                     "response": response,
                     "provider": provider,
@@ -101,6 +202,7 @@ class LLMManager:
                 }
             except Exception as e:
                 print(f"Provider {provider} failed: {e}")
+                self._record_failure(provider)
                 continue
         
         return {
@@ -110,5 +212,56 @@ class LLMManager:
             "error": "No available LLM providers"
         }
 
+    async def astream_invoke(self, prompt: Union[str, List[BaseMessage]], preferred_provider: Optional[str] = None,
+                             cache_key: Optional[str] = None) -> AsyncIterator[str]:
+        """
+        Stream the LLM response as text deltas, falling back to the next provider
+        only if the current one fails before producing any output.
+        
+        Args:
+            prompt: The prompt, or chat messages, to send to the LLM
+            preferred_provider: Preferred provider name
+            cache_key: Short text that determines the prompt (e.g. the task); when given,
+                the cache matches on it semantically, otherwise only exact prompts match
+            
+        Yields:
+            Text deltas in arrival order
+        """
+        semantic = cache_key is not None
+        if cache_key is None:
+            cache_key = prompt if isinstance(prompt, str) else get_buffer_string(prompt)
+        if self.cache is not None:
+            cached = await asyncio.to_thread(self.cache.get, cache_key, semantic)
+            if cached is not None:
+                yield cached["response"].content
+                return
+        
+        for provider in self._providers_to_try(preferred_provider):
+            llm = self.providers[provider]
+            parts: List[str] = []
+            started = False
+            try:
+                async for chunk in llm.astream(prompt):
+                    started = True
+                    if chunk.content:
+                        parts.append(chunk.content)
+                        yield chunk.content
+            except Exception as e:
+                self._record_failure(provider)
+                if started:
+                    # Part of the answer already reached the caller; a fallback would duplicate it
+                    raise
+                print(f"Provider {provider} failed: {e}")
+                continue
+            self._record_success(provider)
+            if self.cache is not None and started:
+                # The text is joined once here, only for the cache. Cached responses are
+                # always messages, so the invoke paths can share this entry
+                message = AIMessage(content="".join(parts))
+                await asyncio.to_thread(self.cache.put, cache_key, {"response": message, "provider": provider}, semantic)
+            return
+        
+        raise RuntimeError("No available LLM providers")
+
 # Global instance
 llm_manager = LLMManager() 
\ No newline at end of file
@@ -1,20 +1,32 @@
-from fastapi import APIRouter, UploadFile, File, HTTPException, Request, status
-from fastapi.responses import StreamingResponse
+from fastapi import APIRouter, Depends, UploadFile, File, HTTPException, Request, status
+from sse_starlette.sse import EventSourceResponse
+from starlette.background import BackgroundTask
 from pydantic import BaseModel, Field, HttpUrl
-from typing import List, Optional, Any, Dict, Union
+from typing import BinaryIO, List, Optional, Any, Dict, Union
 import asyncio
-import json
+import orjson
 import docx
+import fitz
 from PyPDF2 import PdfReader
-import io
+import zipfile
+from lxml import etree
 import logging
+import os
 from app.agents.graph import graph
+from app.utils.semantic_cache import SemanticCache
 from app.utils.vector_store import VectorStore
 
 logger = logging.getLogger("multiagent")
 
 router = APIRouter()
 
+# Completed runs keyed by task meaning: a repeated (or reworded) task replays the
+# stored update events instead of running the whole graph again. Set
+# DISABLE_REPORT_CACHE=1 to always run the graph.
+report_cache: Optional[SemanticCache] = None
+if os.getenv("DISABLE_REPORT_CACHE", "").lower() not in ("1", "true", "yes"):
+    report_cache = SemanticCache(threshold=0.97, max_entries=1000, ttl=3600.0)
+
 # --- Request and Response Models ---
 
 class AddDocumentsRequest(BaseModel):
@@ -52,111 +64,229 @@ class AddLinkResponse(BaseModel):
     message: str
     error: Optional[str] = None
 
+# --- Dependencies ---
+
+def get_vector_store(request: Request) -> VectorStore:
+    """The process-wide VectorStore created once at startup (see main.py)."""
+    return request.app.state.vector_store
+
 # --- Endpoints ---
 
 @router.post("/add-documents", response_model=AddDocumentsResponse)
-async def add_documents(request: AddDocumentsRequest):
+async def add_documents(request: AddDocumentsRequest, vector_store: VectorStore = Depends(get_vector_store)):
     """Add a list of documents to the vector store."""
-    vector_store = VectorStore()
     try:
-        vector_store.add_documents(index_name=request.index_name, documents=request.documents)
+        # Embedding and indexing block for seconds; run them off the event loop
+        await asyncio.to_thread(vector_store.add_documents, index_name=request.index_name, documents=request.documents)
         return AddDocumentsResponse(success=True, message=f"Successfully added {len(request.documents)} documents to index '{request.index_name}'.", error=None)
     except Exception as e:
         logger.error(f"Failed to add documents: {str(e)}")
         return AddDocumentsResponse(success=False, message="Failed to add documents.", error=str(e))
 
+def _extract_pdf_pages(source: BinaryIO) -> List[str]:
+    """Extract the text of each page of a PDF, one string per page."""
+    # MuPDF decodes the content streams in C; PyPDF2 is kept for files it rejects
+    try:
+        with fitz.open(stream=source.read(), filetype="pdf") as doc:
+            return [page.get_text() for page in doc]
+    except Exception:
+        source.seek(0)
+        reader = PdfReader(source)
+        return [page.extract_text() for page in reader.pages]
+
+_W_NS = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+_W_P = _W_NS + "p"
+_W_R = _W_NS + "r"
+_W_T = _W_NS + "t"
+_W_TAB = _W_NS + "tab"
+_W_BR = _W_NS + "br"
+_W_CR = _W_NS + "cr"
+_W_TYPE = _W_NS + "type"
+# Legacy copies of AlternateContent (e.g. text boxes) repeat the mc:Choice text
+_MC_FALLBACK = "{http://schemas.openxmlformats.org/markup-compatibility/2006}Fallback"
+
+def _extract_docx_text(source: BinaryIO) -> str:
+    """Extract the paragraph text of a DOCX document."""
+    # Walk word/document.xml with lxml, one line per w:p paragraph, instead of
+    # building python-docx's paragraph objects; runs map to text the same way
+    # python-docx's Run.text does. Entities and network access stay disabled
+    # because the XML comes from an uploaded file.
+    parser = etree.XMLParser(resolve_entities=False, no_network=True)
+    try:
+        with zipfile.ZipFile(source) as archive:
+            root = etree.fromstring(archive.read("word/document.xml"), parser)
+    except (KeyError, zipfile.BadZipFile, etree.XMLSyntaxError):
+        source.seek(0)
+        doc = docx.Document(source)
+        return "\n".join(para.text for para in doc.paragraphs)
+    parts = []
+    walker = etree.iterwalk(root, events=("start",))
+    for _, element in walker:
+        tag = element.tag
+        if tag == _MC_FALLBACK:
+            walker.skip_subtree()
+        elif tag == _W_P:
+            if parts:
+                parts.append("\n")
+        elif tag == _W_T:
+            if element.text:
+                parts.append(element.text)
+        elif tag in (_W_TAB, _W_BR, _W_CR) and element.getparent().tag == _W_R:
+            # Only run children: w:tab also appears in paragraph tab-stop definitions,
+            # and page/column breaks add no text
+            if tag == _W_TAB:
+                parts.append("\t")
+            elif tag == _W_CR or element.get(_W_TYPE, "textWrapping") == "textWrapping":
+                parts.append("\n")
+    return "".join(parts)
+
+def _parse_pdf(source: BinaryIO) -> List[str]:
+    """Documents of an uploaded PDF."""
+    # One document per page, so a large PDF never becomes one giant string
+    return _extract_pdf_pages(source)
+
+def _parse_docx(source: BinaryIO) -> List[str]:
+    """Documents of an uploaded DOCX file."""
+    return [_extract_docx_text(source)]
+
+def _parse_txt(source: BinaryIO) -> List[str]:
+    """Documents of an uploaded UTF-8 text file."""
+    return [source.read().decode("utf-8")]
+
+# Upload parsers by lower-cased file extension
+_PARSERS = {
+    ".pdf": _parse_pdf,
+    ".docx": _parse_docx,
+    ".txt": _parse_txt,
+}
+
+def _parse_one(filename: str, source: BinaryIO) -> List[str]:
+    """Extract the documents of one uploaded file by extension; unsupported types give []."""
+    parser = _PARSERS.get(os.path.splitext(filename)[1].lower())
+    if parser is None:
+        return []
+    # source is the upload's own SpooledTemporaryFile, read in place rather than
+    # copied into a bytes object first
+    source.seek(0)
+    return parser(source)
+
+# Documents per add_documents call, bounding the chunks embedded at once
+_UPLOAD_BATCH_DOCUMENTS = 500
+
 @router.post("/upload-files", response_model=UploadFilesResponse)
-async def upload_files(files: List[UploadFile] = File(...)):
+async def upload_files(files: List[UploadFile] = File(...), vector_store: VectorStore = Depends(get_vector_store)):
     """Upload and process files (PDF, DOCX, TXT) and add their content to the vector store."""
-    documents = []
     try:
-        for file in files:
-            content = await file.read()
-            if file.filename.endswith(".pdf"):
-                reader = PdfReader(io.BytesIO(content))
-                text = ""
-                for page in reader.pages:
-                    text += page.extract_text()
-                documents.append(text)
-            elif file.filename.endswith(".docx"):
-                doc = docx.Document(io.BytesIO(content))
-                text = "\n".join([para.text for para in doc.paragraphs])
-                documents.append(text)
-            elif file.filename.endswith(".txt"):
-                documents.append(content.decode("utf-8"))
+        # Parse every upload in parallel worker threads
+        parsed = await asyncio.gather(*(
+            asyncio.to_thread(_parse_one, file.filename, file.file)
+            for file in files
+        ))
+        parsed = [[text for text in texts if text.strip()] for texts in parsed]
+        documents = [text for texts in parsed for text in texts]
 
         if documents:
-            vector_store = VectorStore()
-            vector_store.add_documents(index_name="research_docs", documents=documents)
-            return UploadFilesResponse(success=True, message=f"Successfully processed and added {len(documents)} files.", error=None)
+            # Files are batched together: the store chunks the documents and embeds each batch's chunks at once
+            for start in range(0, len(documents), _UPLOAD_BATCH_DOCUMENTS):
+                await asyncio.to_thread(vector_store.add_documents, index_name="research_docs", documents=documents[start:start + _UPLOAD_BATCH_DOCUMENTS])
+            processed = sum(1 for texts in parsed if texts)
+            return UploadFilesResponse(success=True, message=f"Successfully processed and added {processed} files.", error=None)
         else:
             return UploadFilesResponse(success=False, message="No supported files were processed.", error="No supported files.")
     except Exception as e:
         logger.error(f"Failed to process files: {str(e)}")
         return UploadFilesResponse(success=False, message="Failed to process files.", error=str(e))
 
-# Utility for serializing agent output
-def serialize_for_json(obj):
+def _default(obj: Any) -> Any:
+    """Reduce agent output objects orjson cannot encode natively (e.g. LangChain messages)."""
     if hasattr(obj, "content"):
         return obj.content
-    if hasattr(obj, "type") and hasattr(obj, "content"):
-        return {"type": getattr(obj, "type", None), "content": obj.content}
-    if isinstance(obj, list):
-        return [serialize_for_json(item) for item in obj]
-    if isinstance(obj, dict):
-        return {k: serialize_for_json(v) for k, v in obj.items()}
-    return obj
-
-async def run_graph_in_background(task_description: str, queue: asyncio.Queue):
+    return str(obj)
+
+def _dumps(obj: Any) -> str:
+    """Serialize an SSE payload with orjson; nested lists/dicts are walked in C."""
+    return orjson.dumps(obj, default=_default, option=orjson.OPT_NON_STR_KEYS).decode()
+
+async def stream_graph_events(task_description: str, outcome: Optional[Dict[str, Any]] = None):
+    """
+    Run the graph and yield its progress as SSE event dicts.
+
+    When outcome is given, a run that produced a report without errors leaves its
+    update events in outcome["updates"] for caching once the response is sent.
+    """
+    # Per-event logging is debug-only; checked once so nothing is formatted at INFO
+    debug = logger.isEnabledFor(logging.DEBUG)
+    updates = []
+    completed = False
     try:
-        async for event in graph.astream({"task": task_description}):
-            logger.info(f"GRAPH EVENT: {event}")
+        async for mode, event in graph.astream({"task": task_description}, stream_mode=["updates", "custom"]):
+            if mode == "custom":
+                # Token deltas streamed by the agent nodes as they arrive from the LLM
+                yield {"event": "delta", "data": _dumps(event)}
+                continue
+            if debug:
+                logger.debug("GRAPH EVENT: %s", event)
             for key, value in event.items():
                 if key == '__end__':
                     final_report = value.get('report', 'No report generated.')
-                    msg = f"event: end\ndata: {json.dumps(serialize_for_json({'report': final_report}))}\n\n"
-                    logger.info(f"SENDING TO QUEUE: {msg}")
-                    await queue.put(msg)
+                    msg = {"event": "end", "data": _dumps({'report': final_report})}
                 else:
-                    safe_value = serialize_for_json(value if value is not None else {})
-                    msg = f"event: update\ndata: {json.dumps({key: safe_value})}\n\n"
-                    logger.info(f"SENDING TO QUEUE: {msg}")
-                    await queue.put(msg)
-        await queue.put(None)
+                    msg = {"event": "update", "data": _dumps({key: value if value is not None else {}})}
+                    updates.append(msg)
+                    if key == "report_writer":
+                        report = (value or {}).get("report")
+                        completed = bool(report) and all(isinstance(part, str) for part in report)
+                if debug:
+                    logger.debug("SENDING EVENT: %s", msg)
+                yield msg
+        # Only runs that produced a report without errors are worth replaying
+        if completed and outcome is not None:
+            outcome["updates"] = updates
     except Exception as e:
-        err_msg = f"event: error\ndata: {json.dumps({'error': str(e)})}\n\n"
-        logger.error(f"SENDING TO QUEUE (ERROR): {err_msg}")
-        await queue.put(err_msg)
-        await queue.put(None)
+        err_msg = {"event": "error", "data": _dumps({'error': str(e)})}
+        logger.error("SENDING EVENT (ERROR): %s", err_msg)
+        yield err_msg
+
+async def _cache_report(task_description: str, outcome: Dict[str, Any]) -> None:
+    """Store a completed run's update events; runs after the SSE response has finished."""
+    if "updates" in outcome:
+        await asyncio.to_thread(report_cache.put, task_description, outcome["updates"])
 
 @router.post("/generate-report", response_model=None)
 async def generate_report(request: GenerateReportRequest):
     """Generate a research report for a given task. Streams events as Server-Sent Events (SSE)."""
-    queue = asyncio.Queue()
-    asyncio.create_task(run_graph_in_background(request.task_description, queue))
+    if report_cache is not None:
+        cached = await asyncio.to_thread(report_cache.get, request.task_description)
+        if cached is not None:
+            async def replay_events():
+                for item in cached:
+                    yield item
 
-    async def stream_events():
-        while True:
-            item = await queue.get()
-            if item is None:
-                break
-            if item.endswith("\n\n"):
-                yield item
-            queue.task_done()
+            return EventSourceResponse(replay_events(), sep="\n")
 
-    return StreamingResponse(stream_events(), media_type="text/event-stream")
+    # The graph runs inside the response's generator: events go straight to the
+    # client, a slow client paces the graph, and a disconnect cancels it.
+    # "\n" line endings: the frontend splits events on "\n\n". Embedding the task for
+    # the report cache happens in a background task, after the last event is sent.
+    if report_cache is None:
+        return EventSourceResponse(stream_graph_events(request.task_description), sep="\n")
+    outcome: Dict[str, Any] = {}
+    return EventSourceResponse(
+        stream_graph_events(request.task_description, outcome),
+        sep="\n",
+        background=BackgroundTask(_cache_report, request.task_description, outcome),
+    )
 
 @router.post("/add-link", response_model=AddLinkResponse)
-async def add_link(request: AddLinkRequest):
+async def add_link(request: AddLinkRequest, vector_store: VectorStore = Depends(get_vector_store)):
     """Scrape a URL and add its content to the vector store."""
     from app.tools.web_scraper import scrape_website
-    vector_store = VectorStore()
     try:
-        result = scrape_website(str(request.url))
+        result = await asyncio.to_thread(scrape_website, str(request.url))
         if "error" in result:
             return AddLinkResponse(success=False, message="Failed to scrape link.", error=result["error"])
         content = result["content"]
-        vector_store.add_documents(index_name=request.index_name, documents=[content])
+        await asyncio.to_thread(vector_store.add_documents, index_name=request.index_name, documents=[content])
         return AddLinkResponse(success=True, message="Link content added to knowledge base.")
     except Exception as e:
         logger.error(f"Failed to add link: {str(e)}")
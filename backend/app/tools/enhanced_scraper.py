@@ -1,9 +1,40 @@
+import asyncio
+import time
 import requests
-from bs4 import BeautifulSoup
+import httpx
+from bs4 import BeautifulSoup, SoupStrainer
 import re
-from typing import Dict, Optional
+from typing import Dict, List, Optional
 from urllib.parse import urlparse
-import time
+from urllib.robotparser import RobotFileParser
+from collections import defaultdict
+from app.tools.http_session import DEFAULT_HEADERS, MAX_PAGE_BYTES, read_capped, session
+from app.utils.page_cache import PageCache
+
+# Metadata is read from a second parse that builds only <title>/<meta>. Content
+# needs the full tree: page chrome must be present to be decomposed, and the
+# fallback body text spans every tag.
+_METADATA_ONLY = SoupStrainer(['title', 'meta'])
+
+_WS = re.compile(r'\s+')
+_JUNK = re.compile(r'cookie|privacy|terms|conditions|menu|navigation|sidebar|footer|header', re.IGNORECASE)
+
+# Main content candidates, as find() arguments rather than CSS
+# selectors so no selector has to be parsed per page: main, [role="main"],
+# .main-content, .content, #content, article, .post-content, .entry-content
+_MAIN_SELECTORS = (
+    ('main', {}),
+    (None, {'role': 'main'}),
+    (None, {'class': 'main-content'}),
+    (None, {'class': 'content'}),
+    (None, {'id': 'content'}),
+    ('article', {}),
+    (None, {'class': 'post-content'}),
+    (None, {'class': 'entry-content'}),
+)
+
+# Candidates with less text than this are treated as wrappers, not main content
+_MIN_MAIN_CONTENT_CHARS = 200
 
 class EnhancedWebScraper:
     """
@@ -11,26 +42,16 @@ class EnhancedWebScraper:
     """
     
     def __init__(self):
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        })
+        self.session = session
+        self.cache = PageCache()
     
     def clean_text(self, text: str) -> str:
         """Clean and normalize extracted text."""
         if not text:
             return ""
         
-        # Remove extra whitespace
-        text = re.sub(r'\s+', ' ', text)
-        
-        # Remove common web artifacts
-        text = re.sub(r'cookie|privacy|terms|conditions', '', text, flags=re.IGNORECASE)
-        
-        # Remove navigation elements
-        text = re.sub(r'menu|navigation|sidebar|footer|header', '', text, flags=re.IGNORECASE)
-        
-        return text.strip()
+        # Remove web artifacts and navigation words in one pass, then collapse whitespace
+        return _WS.sub(' ', _JUNK.sub('', text)).strip()
     
     def extract_metadata(self, soup: BeautifulSoup, url: str) -> Dict[str, str]:
         """Extract metadata from the webpage."""
@@ -70,24 +91,15 @@ class EnhancedWebScraper:
         for script in soup(["script", "style", "nav", "header", "footer", "aside"]):
             script.decompose()
         
-        # Try to find main content areas
-        main_selectors = [
-            'main',
-            '[role="main"]',
-            '.main-content',
-            '.content',
-            '#content',
-            'article',
-            '.post-content',
-            '.entry-content'
-        ]
-        
+        # Take the longest main content candidate, so a small wrapper matched by an
+        # earlier selector does not win over the real article body
         main_content = ""
-        for selector in main_selectors:
-            element = soup.select_one(selector)
+        for tag, attrs in _MAIN_SELECTORS:
+            element = soup.find(tag, attrs=attrs)
             if element:
-                main_content = element.get_text()
-                break
+                text = element.get_text().strip()
+                if len(text) >= _MIN_MAIN_CONTENT_CHARS and len(text) > len(main_content):
+                    main_content = text
         
         # If no main content found, get body text
         if not main_content:
@@ -95,6 +107,36 @@ class EnhancedWebScraper:
         
         return self.clean_text(main_content)
     
+    def parse_html(self, html: bytes, url: str) -> Dict[str, any]:
+        """
+        Parse fetched HTML into the scraper's result dict.
+        
+        Args:
+            html: Raw response body
+            url: The URL the body was fetched from
+            
+        Returns:
+            Dict containing scraped content and metadata
+        """
+        # Parse HTML with the C-backed lxml parser
+        soup = BeautifulSoup(html, 'lxml')
+        head_soup = BeautifulSoup(html, 'lxml', parse_only=_METADATA_ONLY)
+        
+        # Extract content and metadata
+        content = self.extract_main_content(soup)
+        metadata = self.extract_metadata(head_soup, url)
+        
+        # Limit content length to avoid token limits
+        if len(content) > 8000:
+            content = content[:8000] + "... [Content truncated]"
+        return {
+            "content": content,
+            "metadata": metadata,
+            "url": url,
+            "status": "success",
+            "content_length": len(content)
+        }
+    
     def scrape_website(self, url: str, timeout: int = 15) -> Dict[str, any]:
         """
         Enhanced website scraping with better error handling and content extraction.
@@ -112,34 +154,25 @@ class EnhancedWebScraper:
             if not parsed_url.scheme:
                 url = f"https://{url}"
             
-            # Make request with timeout and retry
-            for attempt in range(2):
-                try:
-                    response = self.session.get(url, timeout=timeout)
-                    response.raise_for_status()
-                    break
-                except requests.RequestException as e:
-                    if attempt == 1:  # Last attempt
-                        return {"error": f"Failed to fetch URL after retries: {str(e)}"}
-                    time.sleep(1)  # Wait before retry
+            cached = self.cache.get(url)
+            if cached and self.cache.is_fresh(cached):
+                return cached["result"]
             
-            # Parse HTML
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            # Extract content and metadata
-            content = self.extract_main_content(soup)
-            metadata = self.extract_metadata(soup, url)
+            # Retries with backoff are handled by the shared session's adapter
+            # The body is streamed and capped so huge pages never sit in memory in full
+            try:
+                with self.session.get(url, timeout=timeout, stream=True,
+                                      headers=self.cache.conditional_headers(cached)) as response:
+                    if cached and response.status_code == 304:
+                        return self.cache.revalidated(url, cached)
+                    response.raise_for_status()
+                    html = read_capped(response)
+            except requests.RequestException as e:
+                return {"error": f"Failed to fetch URL after retries: {str(e)}"}
             
-            # Limit content length to avoid token limits
-            if len(content) > 8000:
-                content = content[:8000] + "... [Content truncated]"
-            return {
-                "content": content,
-                "metadata": metadata,
-                "url": url,
-                "status": "success",
-                "content_length": len(content)
-            }
+            result = self.parse_html(html, url)
+            self.cache.put(url, result, response.headers.get("ETag"), response.headers.get("Last-Modified"))
+            return result
             
         except requests.RequestException as e:
             return {"error": f"Request error: {str(e)}"}
@@ -159,4 +192,101 @@ def scrape_website_enhanced(url: str) -> Dict[str, any]:
     Returns:
         Dict containing scraped content and metadata
     """
-    return enhanced_scraper.scrape_website(url) 
\ No newline at end of file
+    return enhanced_scraper.scrape_website(url)
+
+def _interleave_by_host(urls: List[str]) -> List[int]:
+    """Order URL indices round-robin across hosts so concurrent slots hit distinct domains."""
+    by_host: Dict[str, List[int]] = defaultdict(list)
+    for index, url in enumerate(urls):
+        by_host[urlparse(url).netloc].append(index)
+    queues = list(by_host.values())
+    order = []
+    for position in range(max((len(q) for q in queues), default=0)):
+        order.extend(q[position] for q in queues if position < len(q))
+    return order
+
+async def scrape_batch(urls: List[str], max_concurrency: int = 5, timeout: int = 15,
+                       min_domain_interval: float = 1.5) -> List[Dict[str, any]]:
+    """
+    Scrape several URLs concurrently over one pooled HTTP/2 client.
+    
+    Requests to the same host are spaced at least min_domain_interval seconds apart,
+    URLs are started round-robin across hosts, and robots.txt is honoured (fetched
+    once per host).
+    
+    Args:
+        urls: The URLs to scrape
+        max_concurrency: Maximum number of requests in flight at once
+        timeout: Request timeout in seconds
+        min_domain_interval: Minimum delay between requests to one host, in seconds
+        
+    Returns:
+        One result dict per URL, in input order; failures are {"error": str}
+    """
+    urls = [url if urlparse(url).scheme else f"https://{url}" for url in urls]
+    semaphore = asyncio.Semaphore(max_concurrency)
+    host_locks: Dict[str, asyncio.Lock] = defaultdict(asyncio.Lock)
+    last_hit: Dict[str, float] = {}
+    robots: Dict[str, Optional[RobotFileParser]] = {}
+    loop = asyncio.get_running_loop()
+    limits = httpx.Limits(max_connections=50, max_keepalive_connections=20)
+    user_agent = DEFAULT_HEADERS['User-Agent']
+    
+    async with httpx.AsyncClient(http2=True, limits=limits, timeout=timeout,
+                                 headers={'User-Agent': user_agent}, follow_redirects=True) as client:
+        async def fetch_robots(parsed) -> Optional[RobotFileParser]:
+            """Fetch and parse a host's robots.txt; None means everything is allowed."""
+            try:
+                response = await client.get(f"{parsed.scheme}://{parsed.netloc}/robots.txt")
+            except httpx.HTTPError:
+                return None
+            parser = RobotFileParser()
+            # Same interpretation as RobotFileParser.read(): auth errors disallow, other errors allow
+            if response.status_code in (401, 403):
+                parser.disallow_all = True
+            elif response.status_code >= 400:
+                return None
+            else:
+                parser.parse(response.text.splitlines())
+            return parser
+        
+        async def scrape_one(url: str) -> Dict[str, any]:
+            cached = enhanced_scraper.cache.get(url)
+            if cached and enhanced_scraper.cache.is_fresh(cached):
+                return cached["result"]
+            parsed = urlparse(url)
+            host = parsed.netloc
+            async with host_locks[host]:
+                if host not in robots:
+                    robots[host] = await fetch_robots(parsed)
+                if robots[host] is not None and not robots[host].can_fetch(user_agent, url):
+                    return {"error": "Disallowed by robots.txt"}
+                wait = last_hit.get(host, 0.0) + min_domain_interval - time.monotonic()
+                if wait > 0:
+                    await asyncio.sleep(wait)
+                last_hit[host] = time.monotonic()
+            async with semaphore:
+                try:
+                    async with client.stream("GET", url, headers=enhanced_scraper.cache.conditional_headers(cached)) as response:
+                        if cached and response.status_code == 304:
+                            return enhanced_scraper.cache.revalidated(url, cached)
+                        response.raise_for_status()
+                        html = bytearray()
+                        async for chunk in response.aiter_bytes():
+                            html += chunk
+                            if len(html) >= MAX_PAGE_BYTES:
+                                break
+                except httpx.HTTPError as e:
+                    return {"error": f"Request error: {str(e)}"}
+            # Parsing is CPU-bound; keep it off the event loop
+            result = await loop.run_in_executor(None, enhanced_scraper.parse_html, bytes(html[:MAX_PAGE_BYTES]), url)
+            enhanced_scraper.cache.put(url, result, response.headers.get("ETag"), response.headers.get("Last-Modified"))
+            return result
+        
+        order = _interleave_by_host(urls)
+        outcomes = await asyncio.gather(*(scrape_one(urls[i]) for i in order), return_exceptions=True)
+    
+    results: List[Dict[str, any]] = [{}] * len(urls)
+    for index, outcome in zip(order, outcomes):
+        results[index] = {"error": f"Unexpected error: {str(outcome)}"} if isinstance(outcome, Exception) else outcome
+    return results
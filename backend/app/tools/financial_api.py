@@ -1,4 +1,6 @@
 import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
 from alpha_vantage.fundamentaldata import FundamentalData
 from dotenv import load_dotenv
 
@@ -6,6 +8,9 @@ load_dotenv()
 
 API_KEY = os.getenv("ALPHA_VANTAGE_API_KEY")
 
+# Built once per process rather than on every call
+fd = FundamentalData(key=API_KEY, output_format='json') if API_KEY else None
+
 class FinancialAPIError(Exception):
     pass
 
@@ -19,7 +24,6 @@ def get_financial_data(company_symbol: str) -> dict:
         return {"error": "Alpha Vantage API key not found."}
 
     try:
-        fd = FundamentalData(key=API_KEY, output_format='json')
         data, _ = fd.get_company_overview(symbol=company_symbol)
         if not data:
             return {"error": f"No data found for symbol {company_symbol}"}
@@ -41,3 +45,15 @@ def get_financial_data(company_symbol: str) -> dict:
         return filtered_data
     except Exception as e:
         return {"error": f"FinancialAPIError: {e}"}
+
+
+def get_financial_data_batch(company_symbols: List[str], max_workers: int = 8) -> List[dict]:
+    """
+    Fetches key financial metrics for several company symbols concurrently.
+    Returns:
+        list: one get_financial_data() result per symbol, in input order
+    """
+    if not company_symbols:
+        return []
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(company_symbols))) as executor:
+        return list(executor.map(get_financial_data, company_symbols))
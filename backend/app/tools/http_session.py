@@ -0,0 +1,48 @@
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.request import ACCEPT_ENCODING
+from urllib3.util.retry import Retry
+
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+    'Connection': 'keep-alive',
+    # gzip/deflate, plus br when brotli is installed so urllib3 can decode it
+    'Accept-Encoding': ACCEPT_ENCODING,
+}
+
+# Pages are read in 64 KiB chunks and cut off at 2 MiB; the extractors keep at
+# most 8000 characters, so anything past that only costs memory.
+READ_CHUNK_SIZE = 64 * 1024
+MAX_PAGE_BYTES = 2 * 1024 * 1024
+
+def read_capped(response: requests.Response, limit: int = MAX_PAGE_BYTES) -> bytes:
+    """Read a streamed response body, stopping once limit bytes have arrived."""
+    buffer = bytearray()
+    for chunk in response.iter_content(READ_CHUNK_SIZE):
+        buffer += chunk
+        if len(buffer) >= limit:
+            break
+    return bytes(buffer[:limit])
+
+def create_session() -> requests.Session:
+    """
+    Build a requests Session with pooled keep-alive connections and urllib3 retries.
+    """
+    retry = Retry(
+        total=2,
+        backoff_factor=0.5,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=frozenset(["GET", "HEAD"]),
+        # urllib3 would otherwise sleep for whatever Retry-After a 429/503 asks for,
+        # uncapped and outside the request timeout; keep to the short backoff instead
+        respect_retry_after_header=False,
+    )
+    adapter = HTTPAdapter(pool_connections=20, pool_maxsize=50, max_retries=retry)
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers.update(DEFAULT_HEADERS)
+    return session
+
+# Shared by both scrapers so repeated requests to a host reuse an open connection
+session = create_session()
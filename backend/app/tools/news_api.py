@@ -2,12 +2,16 @@ import os
 from newsapi import NewsApiClient
 from dotenv import load_dotenv
 
-from typing import Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
 
 load_dotenv()
 
 API_KEY = os.getenv("NEWS_API_KEY")
 
+# Built once per process rather than on every call
+newsapi = NewsApiClient(api_key=API_KEY) if API_KEY else None
+
 class NewsAPIError(Exception):
     pass
 
@@ -21,7 +25,6 @@ def get_news_articles(query: str, num_articles: Optional[int] = 5) -> dict:
         return {"error": "NewsAPI key not found."}
 
     try:
-        newsapi = NewsApiClient(api_key=API_KEY)
         top_headlines = newsapi.get_everything(
             q=query,
             language='en',
@@ -41,4 +44,15 @@ def get_news_articles(query: str, num_articles: Optional[int] = 5) -> dict:
         ]
         return {"articles": articles}
     except Exception as e:
-        return {"error": f"NewsAPIError: {e}"}
\ No newline at end of file
+        return {"error": f"NewsAPIError: {e}"}
+
+def get_news_articles_batch(queries: List[str], num_articles: Optional[int] = 5, max_workers: int = 8) -> List[dict]:
+    """
+    Fetches news articles for several queries concurrently.
+    Returns:
+        list: one get_news_articles() result per query, in input order
+    """
+    if not queries:
+        return []
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(queries))) as executor:
+        return list(executor.map(lambda query: get_news_articles(query, num_articles), queries))
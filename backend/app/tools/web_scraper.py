@@ -1,5 +1,6 @@
 import requests
 from bs4 import BeautifulSoup
+from app.tools.http_session import read_capped, session
 
 class WebScraperError(Exception):
     pass
@@ -11,9 +12,10 @@ def scrape_website(url: str) -> dict:
         dict: {"content": str} or {"error": str}
     """
     try:
-        response = requests.get(url, timeout=10)
-        response.raise_for_status()
-        soup = BeautifulSoup(response.content, "html.parser")
+        with session.get(url, timeout=10, stream=True) as response:
+            response.raise_for_status()
+            html = read_capped(response)
+        soup = BeautifulSoup(html, "html.parser")
         text = soup.get_text(separator=' ', strip=True)
         return {"content": text}
     except requests.RequestException as e:
@@ -0,0 +1,95 @@
+import hashlib
+import os
+import sqlite3
+import tempfile
+import threading
+from typing import List, Optional
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+class CachedEmbeddings(Embeddings):
+    """
+    Embeddings wrapper that stores document vectors in SQLite keyed by content hash.
+
+    Re-indexing text that was embedded before (same SHA-256, same model) reads the
+    stored vector instead of running the model; only misses are embedded, in
+    batches of batch_size, each written back as soon as it is done. Query
+    embeddings are passed straight through. The database sits in the system temp
+    directory unless EMBEDDING_CACHE_PATH or path says otherwise, and is opened
+    on first use rather than at import.
+    """
+
+    def __init__(self, underlying: Embeddings, model: str, path: Optional[str] = None,
+                 batch_size: int = 96):
+        self.underlying = underlying
+        self.model = model
+        self.batch_size = batch_size
+        self._lock = threading.Lock()
+        self._path = path or os.getenv(
+            "EMBEDDING_CACHE_PATH", os.path.join(tempfile.gettempdir(), "embedding_cache.sqlite3"))
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _connection(self) -> sqlite3.Connection:
+        """Open the database and create its table on first use. Caller must hold self._lock."""
+        if self._conn is None:
+            conn = sqlite3.connect(self._path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings ("
+                "hash TEXT NOT NULL, model TEXT NOT NULL, vector BLOB NOT NULL, "
+                "PRIMARY KEY (hash, model))"
+            )
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    @staticmethod
+    def _hash(text: str) -> str:
+        return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+    def _lookup(self, hashes: List[str]) -> dict:
+        """Fetch the cached vectors for hashes, in batches below SQLite's parameter limit."""
+        found = {}
+        unique = list(dict.fromkeys(hashes))
+        with self._lock:
+            conn = self._connection()
+            for start in range(0, len(unique), 500):
+                batch = unique[start:start + 500]
+                rows = conn.execute(
+                    f"SELECT hash, vector FROM embeddings WHERE model = ? AND hash IN ({','.join('?' * len(batch))})",
+                    [self.model, *batch],
+                )
+                for digest, blob in rows:
+                    found[digest] = np.frombuffer(blob, dtype='float32').tolist()
+        return found
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embed texts, running the model only on texts not already cached."""
+        hashes = [self._hash(text) for text in texts]
+        found = self._lookup(hashes)
+
+        missing = list(dict.fromkeys(digest for digest in hashes if digest not in found))
+        if missing:
+            first_text = {}
+            for text, digest in zip(texts, hashes):
+                first_text.setdefault(digest, text)
+            # Storing each batch as it completes keeps the work of an interrupted
+            # re-index and bounds the vectors held before they are written
+            for start in range(0, len(missing), self.batch_size):
+                batch = missing[start:start + self.batch_size]
+                vectors = self.underlying.embed_documents([first_text[digest] for digest in batch])
+                rows = []
+                for digest, vector in zip(batch, vectors):
+                    found[digest] = list(vector)
+                    rows.append((digest, self.model, np.asarray(vector, dtype='float32').tobytes()))
+                with self._lock:
+                    conn = self._connection()
+                    conn.executemany("INSERT OR REPLACE INTO embeddings VALUES (?, ?, ?)", rows)
+                    conn.commit()
+
+        return [found[digest] for digest in hashes]
+
+    def embed_query(self, text: str) -> List[float]:
+        """Embed a search query (not cached)."""
+        return self.underlying.embed_query(text)
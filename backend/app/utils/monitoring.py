@@ -1,22 +1,35 @@
+import atexit
 import time
-import json
+import orjson
 import logging
+import logging.handlers
 from datetime import datetime
-from typing import Dict, Any, Optional
-from dataclasses import dataclass, asdict
+from typing import Dict, Any, List, Optional
+from dataclasses import dataclass
 from collections import defaultdict
 import threading
+import queue
 
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('agent_monitoring.log'),
-        logging.StreamHandler()
-    ]
-)
+# Log records are only enqueued on the calling thread; a background listener does
+# the formatting and the file/console writes.
+log_queue: queue.Queue = queue.Queue(-1)
+_formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+_file_handler = logging.FileHandler('agent_monitoring.log')
+_file_handler.setFormatter(_formatter)
+_stream_handler = logging.StreamHandler()
+_stream_handler.setFormatter(_formatter)
+log_listener = logging.handlers.QueueListener(log_queue, _file_handler, _stream_handler)
+log_listener.start()
+atexit.register(log_listener.stop)
 
-@dataclass
+# The QueueHandler is the monitoring logger's only handler; it has no formatter,
+# so records reach the listener unformatted
+_monitoring_logger = logging.getLogger(__name__)
+_monitoring_logger.setLevel(logging.INFO)
+_monitoring_logger.addHandler(logging.handlers.QueueHandler(log_queue))
+_monitoring_logger.propagate = False
+
+@dataclass(slots=True)
 class AgentMetrics:
     """Metrics for individual agent performance."""
     agent_name: str
@@ -35,8 +48,22 @@ class AgentMetrics:
         if self.end_time:
             return self.end_time - self.start_time
         return time.time() - self.start_time
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Shallow dict of the fields (cheaper than dataclasses.asdict's deep copy)."""
+        return {
+            "agent_name": self.agent_name,
+            "start_time": self.start_time,
+            "end_time": self.end_time,
+            "success": self.success,
+            "error_message": self.error_message,
+            "input_tokens": self.input_tokens,
+            "output_tokens": self.output_tokens,
+            "provider_used": self.provider_used,
+            "tool_calls": self.tool_calls,
+        }
 
-@dataclass
+@dataclass(slots=True)
 class TaskMetrics:
     """Metrics for complete task execution."""
     task_id: str
@@ -63,6 +90,22 @@ class TaskMetrics:
         if self.end_time:
             return self.end_time - self.start_time
         return time.time() - self.start_time
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Shallow dict of the fields (cheaper than dataclasses.asdict's deep copy)."""
+        return {
+            "task_id": self.task_id,
+            "task_description": self.task_description,
+            "start_time": self.start_time,
+            "end_time": self.end_time,
+            "total_agents": self.total_agents,
+            "successful_agents": self.successful_agents,
+            "failed_agents": self.failed_agents,
+            "total_duration": self.total_duration,
+            "total_tokens": self.total_tokens,
+            "providers_used": list(self.providers_used),
+            "tools_used": list(self.tools_used),
+        }
 
 class MonitoringSystem:
     """
@@ -76,92 +119,112 @@ class MonitoringSystem:
         self.api_usage: Dict[str, int] = defaultdict(int)
         self.tool_usage: Dict[str, int] = defaultdict(int)
         self.error_counts: Dict[str, int] = defaultdict(int)
+        # Agent ids started under each task, so end_task only visits its own agents
+        self.task_to_agents: Dict[str, List[str]] = defaultdict(list)
+        # Hot-path counter updates are queued without locking; a daemon thread folds
+        # them into the counters above as they arrive, so the queue stays short.
+        self._counter_events: queue.SimpleQueue = queue.SimpleQueue()
         self._lock = threading.Lock()
+        threading.Thread(target=self._consume_counter_events, name="monitoring-counters",
+                         daemon=True).start()
     
     def start_task(self, task_id: str, task_description: str) -> str:
         """Start monitoring a new task."""
-        with self._lock:
-            task_metrics = TaskMetrics(
-                task_id=task_id,
-                task_description=task_description,
-                start_time=time.time()
-            )
-            self.active_tasks[task_id] = task_metrics
-            self.logger.info(f"Started task: {task_id} - {task_description}")
-            return task_id
+        task_metrics = TaskMetrics(
+            task_id=task_id,
+            task_description=task_description,
+            start_time=time.time()
+        )
+        # A single dict assignment is atomic, so registering needs no lock
+        self.active_tasks[task_id] = task_metrics
+        self.logger.info(f"Started task: {task_id} - {task_description}")
+        return task_id
     
     def end_task(self, task_id: str, success: bool = True) -> None:
         """End monitoring for a task."""
+        summary = None
         with self._lock:
             if task_id in self.active_tasks:
                 task = self.active_tasks[task_id]
                 task.end_time = time.time()
                 task.total_duration = task.duration
                 
+                agents = [self.agent_metrics[agent_id] for agent_id in self.task_to_agents.get(task_id, ())]
+                
                 # Calculate totals
-                task.total_agents = len([m for m in self.agent_metrics.values() if m.agent_name.startswith(task_id)])
-                task.successful_agents = len([m for m in self.agent_metrics.values() if m.agent_name.startswith(task_id) and m.success])
+                task.total_agents = len(agents)
+                task.successful_agents = sum(1 for m in agents if m.success)
                 task.failed_agents = task.total_agents - task.successful_agents
                 
                 # Get unique providers and tools used
-                task.providers_used = list(set([m.provider_used for m in self.agent_metrics.values() if m.agent_name.startswith(task_id) and m.provider_used]))
+                task.providers_used = list({m.provider_used for m in agents if m.provider_used})
                 
                 self.logger.info(f"Completed task: {task_id} - Duration: {task.total_duration:.2f}s - Success: {success}")
                 
-                # Log task summary
-                self._log_task_summary(task)
+                summary = self._task_summary(task)
+        
+        # Serialize and log the summary after releasing the lock
+        if summary is not None:
+            self._log_task_summary(summary)
     
     def start_agent(self, task_id: str, agent_name: str) -> str:
         """Start monitoring an agent execution."""
-        with self._lock:
-            agent_id = f"{task_id}_{agent_name}_{int(time.time())}"
-            metrics = AgentMetrics(
-                agent_name=agent_name,
-                start_time=time.time()
-            )
-            self.agent_metrics[agent_id] = metrics
-            self.logger.info(f"Started agent: {agent_name} for task: {task_id}")
-            return agent_id
+        agent_id = f"{task_id}_{agent_name}_{int(time.time())}"
+        metrics = AgentMetrics(
+            agent_name=agent_name,
+            start_time=time.time()
+        )
+        self.agent_metrics[agent_id] = metrics
+        self.task_to_agents[task_id].append(agent_id)
+        self.logger.info(f"Started agent: {agent_name} for task: {task_id}")
+        return agent_id
     
     def end_agent(self, agent_id: str, success: bool = True, error_message: Optional[str] = None, 
                   provider_used: Optional[str] = None, input_tokens: int = 0, output_tokens: int = 0) -> None:
         """End monitoring for an agent."""
-        with self._lock:
-            if agent_id in self.agent_metrics:
-                metrics = self.agent_metrics[agent_id]
-                metrics.end_time = time.time()
-                metrics.success = success
-                metrics.error_message = error_message
-                metrics.provider_used = provider_used
-                metrics.input_tokens = input_tokens
-                metrics.output_tokens = output_tokens
-                
-                # Update API usage
-                if provider_used:
-                    self.api_usage[provider_used] += 1
-                
-                # Update error counts
-                if not success:
-                    self.error_counts[metrics.agent_name] += 1
-                
-                self.logger.info(f"Completed agent: {metrics.agent_name} - Duration: {metrics.duration:.2f}s - Success: {success}")
+        # Each agent's metrics object is only written by the caller that owns it
+        metrics = self.agent_metrics.get(agent_id)
+        if metrics is not None:
+            metrics.end_time = time.time()
+            metrics.success = success
+            metrics.error_message = error_message
+            metrics.provider_used = provider_used
+            metrics.input_tokens = input_tokens
+            metrics.output_tokens = output_tokens
+            
+            # Update API usage
+            if provider_used:
+                self._counter_events.put((self.api_usage, provider_used))
+            
+            # Update error counts
+            if not success:
+                self._counter_events.put((self.error_counts, metrics.agent_name))
+            
+            self.logger.info(f"Completed agent: {metrics.agent_name} - Duration: {metrics.duration:.2f}s - Success: {success}")
     
     def record_tool_usage(self, tool_name: str) -> None:
         """Record tool usage."""
-        with self._lock:
-            self.tool_usage[tool_name] += 1
+        self._counter_events.put((self.tool_usage, tool_name))
     
     def record_llm_call(self, provider: str, input_tokens: int, output_tokens: int) -> None:
         """Record LLM API call."""
-        with self._lock:
-            self.api_usage[provider] += 1
+        self._counter_events.put((self.api_usage, provider))
+    
+    def _consume_counter_events(self) -> None:
+        """Fold queued counter updates into the counters (runs on the consumer thread)."""
+        while True:
+            counter, key = self._counter_events.get()
+            with self._lock:
+                counter[key] += 1
     
     def get_system_stats(self) -> Dict[str, Any]:
         """Get current system statistics."""
         with self._lock:
+            # list() snapshots the values atomically while writers keep inserting
+            agents = list(self.agent_metrics.values())
             total_tasks = len(self.active_tasks)
-            total_agents = len(self.agent_metrics)
-            successful_agents = len([m for m in self.agent_metrics.values() if m.success])
+            total_agents = len(agents)
+            successful_agents = len([m for m in agents if m.success])
             
             return {
                 "active_tasks": total_tasks,
@@ -179,12 +242,12 @@ class MonitoringSystem:
         with self._lock:
             if task_id in self.active_tasks:
                 task = self.active_tasks[task_id]
-                return asdict(task)
+                return task.to_dict()
             return None
     
-    def _log_task_summary(self, task: TaskMetrics) -> None:
-        """Log a summary of task execution."""
-        summary = {
+    def _task_summary(self, task: TaskMetrics) -> Dict[str, Any]:
+        """Build a plain-dict summary of task execution."""
+        return {
             "task_id": task.task_id,
             "description": task.task_description,
             "duration": f"{task.total_duration:.2f}s",
@@ -196,7 +259,9 @@ class MonitoringSystem:
             "providers_used": task.providers_used,
             "success_rate": f"{(task.successful_agents / task.total_agents * 100):.1f}%" if task.total_agents > 0 else "0%"
         }
-        
-        self.logger.info(f"Task Summary: {json.dumps(summary, indent=2)}")
+    
+    def _log_task_summary(self, summary: Dict[str, Any]) -> None:
+        """Log a summary of task execution."""
+        self.logger.info(f"Task Summary: {orjson.dumps(summary, option=orjson.OPT_INDENT_2).decode()}")
 
 monitoring = MonitoringSystem() 
\ No newline at end of file
@@ -0,0 +1,98 @@
+import hashlib
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+import diskcache
+
+class PageCache:
+    """
+    Cache of scraped pages keyed by URL.
+
+    An in-memory LRU sits in front of a diskcache store that survives restarts, so
+    re-running a task or resuming a batch crawl does not re-download known pages.
+    Entries keep the response's ETag/Last-Modified validators: within fresh_for
+    seconds a cached result is served as-is, after that the caller revalidates it
+    with a conditional request. The store lives under the system temp directory
+    unless SCRAPE_CACHE_DIR or directory says otherwise, and is only opened on
+    first use, so importing the scraper never touches the filesystem.
+    """
+
+    def __init__(self, directory: Optional[str] = None, max_memory_entries: int = 512,
+                 fresh_for: float = 300.0):
+        self.max_memory_entries = max_memory_entries
+        self.fresh_for = fresh_for
+        self._memory: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._directory = directory or os.getenv(
+            "SCRAPE_CACHE_DIR", os.path.join(tempfile.gettempdir(), "scrape_cache"))
+        self._store: Optional[diskcache.Cache] = None
+
+    @property
+    def _disk(self) -> diskcache.Cache:
+        if self._store is None:
+            with self._lock:
+                if self._store is None:
+                    self._store = diskcache.Cache(self._directory)
+        return self._store
+
+    @staticmethod
+    def _key(url: str) -> str:
+        return hashlib.blake2b(url.encode('utf-8'), digest_size=16).hexdigest()
+
+    def _remember(self, key: str, entry: Dict[str, Any]) -> None:
+        with self._lock:
+            self._memory[key] = entry
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_memory_entries:
+                self._memory.popitem(last=False)
+
+    def get(self, url: str) -> Optional[Dict[str, Any]]:
+        """Return the cached entry for url, or None."""
+        key = self._key(url)
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                self._memory.move_to_end(key)
+                return entry
+        entry = self._disk.get(key)
+        if entry is not None:
+            self._remember(key, entry)
+        return entry
+
+    def put(self, url: str, result: Dict[str, Any], etag: Optional[str] = None,
+            last_modified: Optional[str] = None) -> None:
+        """Store a successful scrape result together with its validators."""
+        key = self._key(url)
+        entry = {
+            "url": url,
+            "etag": etag,
+            "last_modified": last_modified,
+            "result": result,
+            "fetched_at": time.time(),
+        }
+        self._remember(key, entry)
+        self._disk.set(key, entry)
+
+    def revalidated(self, url: str, entry: Dict[str, Any]) -> Dict[str, Any]:
+        """Mark an entry fresh again after the server answered 304 Not Modified."""
+        self.put(url, entry["result"], entry["etag"], entry["last_modified"])
+        return entry["result"]
+
+    def is_fresh(self, entry: Dict[str, Any]) -> bool:
+        """Whether the entry can be served without revalidating it."""
+        return time.time() - entry["fetched_at"] < self.fresh_for
+
+    @staticmethod
+    def conditional_headers(entry: Optional[Dict[str, Any]]) -> Dict[str, str]:
+        """If-None-Match / If-Modified-Since headers for revalidating an entry."""
+        headers = {}
+        if entry:
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
@@ -0,0 +1,133 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+import faiss
+import numpy as np
+from sentence_transformers import SentenceTransformer
+
+from app.utils.embeddings import EMBEDDING_MODEL_NAME, get_sentence_transformer
+
+class SemanticCache:
+    """
+    Response cache keyed by the meaning of a text rather than its exact bytes.
+
+    Exact repeats are answered from a SHA-256 lookup; near-repeats from a FAISS
+    inner-product search over normalized sentence embeddings (cosine similarity).
+    The model only reads its first max_seq_length word-pieces, so keys longer than
+    that (or stored with semantic=False) are matched exactly and never embedded.
+    Entries are evicted in least-recently-used order once max_entries is reached,
+    and, when ttl is set, are treated as misses once they are ttl seconds old.
+    The model is the process-wide one from get_sentence_transformer, shared with
+    the vector store and any other cache.
+    """
+
+    def __init__(self, threshold: float = 0.97, max_entries: int = 10000,
+                 model_name: str = EMBEDDING_MODEL_NAME, ttl: Optional[float] = None):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.model_name = model_name
+        self._model: Optional[SentenceTransformer] = None
+        self._index: Optional[faiss.IndexIDMap] = None
+        self._entries: "OrderedDict[int, tuple[str, Any, Optional[float]]]" = OrderedDict()
+        self._digests: Dict[str, int] = {}
+        # Embeddings computed by a missed get(), reused by the following put()
+        self._pending: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._next_id = 0
+        self._lock = threading.Lock()
+
+    def _embed(self, text: str) -> np.ndarray:
+        """Embed text as a normalized float32 row vector, loading the model on first use."""
+        if self._model is None:
+            self._model = get_sentence_transformer(self.model_name)
+        vector = self._model.encode([text], convert_to_numpy=True, normalize_embeddings=True)
+        return np.asarray(vector, dtype='float32')
+
+    def _fits_window(self, text: str) -> bool:
+        """Whether the model sees all of text, i.e. its embedding depends on every token."""
+        if self._model is None:
+            self._model = get_sentence_transformer(self.model_name)
+        tokens = self._model.tokenizer(text, add_special_tokens=True, truncation=False, verbose=False)["input_ids"]
+        return len(tokens) <= self._model.max_seq_length
+
+    @staticmethod
+    def _digest(text: str) -> str:
+        return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+    def _live_value(self, entry_id: int) -> Optional[Any]:
+        """Return an entry's value and mark it recently used, dropping it if expired. Caller holds the lock."""
+        digest, value, expires_at = self._entries[entry_id]
+        if expires_at is not None and time.monotonic() >= expires_at:
+            del self._entries[entry_id]
+            del self._digests[digest]
+            if self._index is not None:
+                self._index.remove_ids(np.array([entry_id], dtype='int64'))
+            return None
+        self._entries.move_to_end(entry_id)
+        return value
+
+    def get(self, key: str, semantic: bool = True) -> Optional[Any]:
+        """Return the cached value for key or (if semantic) a semantically equivalent key, else None."""
+        digest = self._digest(key)
+        with self._lock:
+            entry_id = self._digests.get(digest)
+            if entry_id is not None:
+                value = self._live_value(entry_id)
+                if value is not None:
+                    return value
+            if not semantic or self._index is None or self._index.ntotal == 0:
+                return None
+
+        if not self._fits_window(key):
+            return None
+        vector = self._embed(key)
+        with self._lock:
+            self._pending[digest] = vector
+            if len(self._pending) > 128:
+                self._pending.popitem(last=False)
+            scores, ids = self._index.search(vector, 1)
+            entry_id = int(ids[0][0])
+            if entry_id != -1 and scores[0][0] >= self.threshold and entry_id in self._entries:
+                return self._live_value(entry_id)
+        return None
+
+    def put(self, key: str, value: Any, semantic: bool = True) -> None:
+        """Store value under key, evicting the least recently used entries if full."""
+        digest = self._digest(key)
+        with self._lock:
+            if digest in self._digests:
+                return
+            vector = self._pending.pop(digest, None)
+        if vector is None and semantic and self._fits_window(key):
+            vector = self._embed(key)
+
+        with self._lock:
+            if digest in self._digests:
+                return
+            entry_id = self._next_id
+            self._next_id += 1
+            if vector is not None:
+                if self._index is None:
+                    self._index = faiss.IndexIDMap(faiss.IndexFlatIP(vector.shape[1]))
+                self._index.add_with_ids(vector, np.array([entry_id], dtype='int64'))
+            expires_at = time.monotonic() + self.ttl if self.ttl is not None else None
+            self._entries[entry_id] = (digest, value, expires_at)
+            self._digests[digest] = entry_id
+
+            while len(self._entries) > self.max_entries:
+                old_id, (old_digest, _, _) = self._entries.popitem(last=False)
+                del self._digests[old_digest]
+                if self._index is not None:
+                    self._index.remove_ids(np.array([old_id], dtype='int64'))
+
+    def clear(self) -> None:
+        """Drop all cached entries."""
+        with self._lock:
+            self._entries.clear()
+            self._digests.clear()
+            self._pending.clear()
+            if self._index is not None:
+                self._index.reset()
@@ -0,0 +1,82 @@
+import threading
+from typing import List, Optional
+
+from langchain_core.documents import Document
+from transformers import AutoTokenizer
+
+from app.utils.embeddings import EMBEDDING_MODEL_NAME, get_sentence_transformer
+
+class TokenWindowSplitter:
+    """
+    Splits text into overlapping windows of embedding-model tokens.
+
+    Each batch of texts is tokenized once by the fast (Rust) tokenizer; the
+    returned character offsets are used to slice the original text, so chunks
+    line up exactly with what the embedding model will see. The tokenizer and,
+    unless chunk_size is given, the window size come from the shared embedding
+    model, loaded on the first split.
+    """
+
+    def __init__(self, model_name: str = EMBEDDING_MODEL_NAME,
+                 chunk_size: Optional[int] = None, chunk_overlap: int = 64):
+        if chunk_size is not None and chunk_overlap >= chunk_size:
+            raise ValueError("chunk_overlap must be smaller than chunk_size")
+        self.model_name = model_name
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self._tokenizer = None
+        self._lock = threading.Lock()
+
+    @property
+    def tokenizer(self):
+        """The embedding model's tokenizer, loaded (with the default window) on first use."""
+        if self._tokenizer is None:
+            with self._lock:
+                if self._tokenizer is None:
+                    model = get_sentence_transformer(self.model_name)
+                    if self.chunk_size is None:
+                        # Leave room for [CLS]/[SEP] so a chunk fills the model's window
+                        self.chunk_size = model.max_seq_length - 2
+                        if self.chunk_overlap >= self.chunk_size:
+                            raise ValueError("chunk_overlap must be smaller than chunk_size")
+                    # A separate copy: the model's own tokenizer is reconfigured for
+                    # truncation by encode() on other threads
+                    self._tokenizer = AutoTokenizer.from_pretrained(model.tokenizer.name_or_path)
+        return self._tokenizer
+
+    def _windows(self, text: str, offsets: List[tuple]) -> List[str]:
+        """Slice text into token windows using the tokenizer's offset mapping. Needs the tokenizer loaded."""
+        chunks = []
+        step = self.chunk_size - self.chunk_overlap
+        for start in range(0, len(offsets), step):
+            window = offsets[start:start + self.chunk_size]
+            chunks.append(text[window[0][0]:window[-1][1]])
+            if start + self.chunk_size >= len(offsets):
+                break
+        return chunks
+
+    def split_texts(self, texts: List[str]) -> List[List[str]]:
+        """Split each text into chunks with a single batched tokenizer pass."""
+        if not texts:
+            # Fast tokenizers raise on an empty batch
+            return []
+        encodings = self.tokenizer(
+            texts,
+            add_special_tokens=False,
+            return_offsets_mapping=True,
+            return_attention_mask=False,
+            verbose=False,
+        )
+        return [self._windows(text, offsets) for text, offsets in zip(texts, encodings["offset_mapping"])]
+
+    def split_text(self, text: str) -> List[str]:
+        """Split a single text into chunks."""
+        return self.split_texts([text])[0]
+
+    def create_documents(self, texts: List[str]) -> List[Document]:
+        """Split texts into LangChain Documents, as the LangChain text splitters do."""
+        return [
+            Document(page_content=chunk)
+            for chunks in self.split_texts(texts)
+            for chunk in chunks
+        ]
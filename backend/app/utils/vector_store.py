@@ -1,10 +1,18 @@
 # This file should contain the VectorStore class and related vector DB utilities.
 # Move the code from app/vector_store.py here.
 
+import functools
+import time
+
 from langchain_elasticsearch import ElasticsearchStore
 from elasticsearch import Elasticsearch
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain_community.embeddings import HuggingFaceEmbeddings
+from app.utils.embedding_cache import CachedEmbeddings
+from app.utils.embeddings import EMBEDDING_MODEL_NAME, SharedEmbeddings, embedding_backend
+from app.utils.text_splitter import TokenWindowSplitter
+
+# Cached search results are reused for at most this long, so documents indexed by
+# another worker or process become visible without this process adding any
+SEARCH_CACHE_TTL_SECONDS = 60.0
 
 class VectorStore:
     """
@@ -13,13 +21,26 @@ class VectorStore:
     def __init__(self, host="localhost", port="9200"):
         self.host = host
         self.port = port
-        self.embedding_model = HuggingFaceEmbeddings(model_name='all-MiniLM-L6-v2')
-        self.client = Elasticsearch(f"http://{self.host}:{self.port}")
-        self.text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=1000,
-            chunk_overlap=200,
-            length_function=len,
+        # Unit-length vectors from the process-wide model the semantic caches also use
+        # (cosine ranking is unchanged, so existing indices stay valid). Chunks embedded
+        # before (same text, same model and backend) are read back from the on-disk
+        # cache instead of being re-embedded on every re-index
+        self.embedding_model = CachedEmbeddings(
+            SharedEmbeddings(),
+            model=f"{EMBEDDING_MODEL_NAME}:{embedding_backend()}",
+        )
+        self.client = Elasticsearch(
+            f"http://{self.host}:{self.port}",
+            connections_per_node=25,
+            http_compress=True,
+            request_timeout=30,
         )
+        self._stores: dict[str, ElasticsearchStore] = {}
+        self.text_splitter = TokenWindowSplitter(chunk_overlap=64)
+        # Repeated queries (e.g. the researcher re-entering the graph) skip the
+        # embedding and Elasticsearch round-trip; cleared whenever this process adds
+        # documents, and keyed by TTL window so other writers' documents appear too.
+        self._cached_search = functools.lru_cache(maxsize=512)(self._search)
         self._connect()
 
     def _connect(self):
@@ -30,13 +51,17 @@ class VectorStore:
 
     def get_or_create_store(self, index_name: str) -> ElasticsearchStore:
         """
-        Gets an ElasticsearchStore instance for the given index.
+        Gets the ElasticsearchStore for the given index, creating it on first use.
         """
-        return ElasticsearchStore(
-            es_connection=self.client,
-            index_name=index_name,
-            embedding=self.embedding_model
-        )
+        store = self._stores.get(index_name)
+        if store is None:
+            store = ElasticsearchStore(
+                es_connection=self.client,
+                index_name=index_name,
+                embedding=self.embedding_model
+            )
+            self._stores[index_name] = store
+        return store
 
     def add_documents(self, index_name: str, documents: list[str]):
         """
@@ -45,20 +70,25 @@ class VectorStore:
         chunks = self.text_splitter.create_documents(documents)
         store = self.get_or_create_store(index_name)
         store.add_documents(documents=chunks)
+        self._cached_search.cache_clear()
         print(f"Successfully added {len(chunks)} chunks to index '{index_name}'.")
 
     def search(self, index_name: str, query: str, top_k: int = 5) -> list[dict]:
         """
         Searches for the most similar documents in the index based on a text query.
         """
+        return [
+            {"text": text, "score": score}
+            for text, score in self._cached_search(index_name, query, top_k, self._ttl_window())
+        ]
+
+    @staticmethod
+    def _ttl_window() -> int:
+        """Index of the current cache window; results from earlier windows are never hit."""
+        return int(time.monotonic() // SEARCH_CACHE_TTL_SECONDS)
+
+    def _search(self, index_name: str, query: str, top_k: int, ttl_window: int) -> tuple[tuple[str, float], ...]:
+        """Uncached search returning hashable (text, score) pairs; ttl_window only keys the cache."""
         store = self.get_or_create_store(index_name)
         results = store.similarity_search_with_score(query=query, k=top_k)
-        
-        formatted_results = []
-        for doc, score in results:
-            formatted_results.append({
-                "text": doc.page_content,
-                "score": score
-            })
-            
-        return formatted_results 
\ No newline at end of file
+        return tuple((doc.page_content, score) for doc, score in results)
@@ -1,4 +1,5 @@
 import json
+import asyncio
 from app.agents import graph
 
 def lambda_handler(event, context):
@@ -16,7 +17,8 @@ def lambda_handler(event, context):
     try:
         # Initial state for the graph
         state = {"task": task, "research_data": [], "analysis": "", "report": ""}
-        result = graph.invoke(state)
+        # Agent nodes are async, so drive the graph on a fresh event loop
+        result = asyncio.run(graph.ainvoke(state))
         return {
             "statusCode": 200,
             "body": json.dumps(result)
@@ -4,21 +4,18 @@ from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.exceptions import RequestValidationError
 from starlette.exceptions import HTTPException as StarletteHTTPException
-from pydantic import BaseModel
 from dotenv import load_dotenv
 import os
 
+from app.config import get_settings
 
-load_dotenv()
 
-class Settings(BaseModel):
-    OPENAI_API_KEY: str
+# Still loaded into os.environ for the modules that read keys with os.getenv
+load_dotenv()
 
-settings = Settings(
-    OPENAI_API_KEY=os.getenv("OPENAI_API_KEY", "")
-)
+settings = get_settings()
 
-logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(message)s')
+logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO").upper(), format='%(asctime)s %(levelname)s %(message)s')
 logger = logging.getLogger("multiagent")
 
 app = FastAPI(
@@ -57,6 +54,11 @@ async def http_exception_handler(request: Request, exc: StarletteHTTPException):
         content={"detail": exc.detail},
     )
 
+# One VectorStore (Elasticsearch client and embedding model) per process, shared by
+# the agents' retrieval tool and the route handlers
+from app.agents.graph import vector_store
+app.state.vector_store = vector_store
+
 # Import and include modular routes
 from app.routes import router as api_router
 app.include_router(api_router)
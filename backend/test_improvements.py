@@ -75,6 +75,65 @@ def test_monitoring():
     except Exception as e:
         print(f"❌ Monitoring test failed: {e}")
 
+class _TopicEmbedder:
+    """Stand-in for the SentenceTransformer: texts with the same first word embed identically."""
+    max_seq_length = 8
+    
+    def __init__(self):
+        self.topics = {}
+    
+    def tokenizer(self, text, **kwargs):
+        return {"input_ids": text.split()}
+    
+    def encode(self, texts, **kwargs):
+        import numpy as np
+        vectors = np.zeros((len(texts), 16), dtype='float32')
+        for row, text in enumerate(texts):
+            topic = self.topics.setdefault(text.split()[0], len(self.topics))
+            vectors[row, topic] = 1.0
+        return vectors
+
+def test_semantic_cache():
+    """Test semantic cache expiry, eviction and long-key handling with a stubbed embedder."""
+    print("\n🧪 Testing Semantic Cache...")
+    
+    try:
+        import time
+        from utils.semantic_cache import SemanticCache
+        
+        def make_cache(**kwargs):
+            cache = SemanticCache(**kwargs)
+            cache._model = _TopicEmbedder()
+            return cache
+        
+        # An expired entry misses, exactly and semantically
+        cache = make_cache(ttl=0.05)
+        cache.put("alpha report", "A")
+        time.sleep(0.1)
+        expired = cache.get("alpha report") is None and cache.get("alpha summary") is None
+        
+        # An evicted entry is gone from the FAISS index too
+        cache = make_cache(max_entries=1)
+        cache.put("alpha report", "A")
+        cache.put("beta report", "B")
+        evicted = (cache.get("alpha summary") is None and cache.get("beta summary") == "B"
+                   and cache._index.ntotal == 1)
+        
+        # A key longer than the model's window only ever matches exactly
+        cache = make_cache()
+        long_key = "gamma " + "word " * 20
+        cache.put(long_key, "G")
+        long_exact = (cache.get(long_key) == "G" and cache.get(long_key + "more") is None
+                      and cache.get("gamma") is None and cache._index is None)
+        
+        if expired and evicted and long_exact:
+            print("✅ Expiry, eviction and long keys behave as expected")
+        else:
+            print(f"❌ Semantic cache checks: expiry={expired} eviction={evicted} long_keys={long_exact}")
+            
+    except Exception as e:
+        print(f"❌ Semantic cache test failed: {e}")
+
 def test_enhanced_scraper():
     """Test the enhanced web scraper."""
     print("\n🧪 Testing Enhanced Web Scraper...")
@@ -96,6 +155,56 @@ def test_enhanced_scraper():
     except Exception as e:
         print(f"❌ Enhanced scraper test failed: {e}")
 
+def test_scraper_without_main_container():
+    """Test content extraction on a page with no main/article container."""
+    print("\n🧪 Testing Scraper Fallback Content...")
+    
+    try:
+        from tools.enhanced_scraper import enhanced_scraper
+        
+        html = b"""<html><head><title>Acme News</title></head><body>
+            <div><header><div>Login Subscribe</div><nav><div>Home Markets Tech</div></nav></header></div>
+            <h1>Q3 results</h1><ul><li>Revenue rose 12%</li><li>Margins held</li></ul>
+            <table><tr><td>EMEA</td><td>9%</td></tr></table>
+            <aside><div>Opinion</div></aside><footer><div>All rights reserved.</div></footer>
+            </body></html>"""
+        result = enhanced_scraper.parse_html(html, "https://example.com/q3")
+        content = result["content"]
+        
+        kept = all(text in content for text in ("Q3 results", "Revenue rose 12%", "Margins held", "EMEA"))
+        dropped = not any(text in content for text in ("Login", "Home Markets", "Opinion", "All rights reserved"))
+        if kept and dropped and result["metadata"]["title"] == "Acme News":
+            print("✅ Body text kept and page chrome removed")
+        else:
+            print(f"❌ Unexpected content: {content!r}")
+            
+    except Exception as e:
+        print(f"❌ Scraper fallback test failed: {e}")
+
+def test_scraper_main_content_choice():
+    """Test that the longest substantial main content candidate wins."""
+    print("\n🧪 Testing Scraper Main Content Choice...")
+    
+    try:
+        from tools.enhanced_scraper import enhanced_scraper
+        
+        body = "Quarterly revenue grew across every region. " * 10
+        padded = b"<div class='content'>" + b" " * 1000 + b"Read more</div>"
+        html = b"<html><body><nav><div>Home</div></nav>" + padded + b"<article>" + body.encode() + b"</article></body></html>"
+        article = enhanced_scraper.parse_html(html, "https://example.com/a")["content"]
+        
+        # A main container below the threshold falls back to the whole body text
+        short = b"<html><body><nav><div>Home</div></nav><main>Chart</main>\n<p>Revenue rose 12%</p></body></html>"
+        fallback = enhanced_scraper.parse_html(short, "https://example.com/b")["content"]
+        
+        if article == body.strip() and fallback == "Chart Revenue rose 12%":
+            print("✅ Article body chosen and short pages fall back to body text")
+        else:
+            print(f"❌ Unexpected content: {article[:60]!r} / {fallback!r}")
+            
+    except Exception as e:
+        print(f"❌ Scraper main content test failed: {e}")
+
 def test_vector_store():
     """Test the vector store functionality."""
     print("\n🧪 Testing Vector Store...")
@@ -128,9 +237,18 @@ async def main():
     # Test Monitoring
     test_monitoring()
     
+    # Test Semantic Cache
+    test_semantic_cache()
+    
     # Test Enhanced Scraper
     test_enhanced_scraper()
     
+    # Test Scraper Fallback Content
+    test_scraper_without_main_container()
+    
+    # Test Scraper Main Content Choice
+    test_scraper_main_content_choice()
+    
     # Test Vector Store
     test_vector_store()
     
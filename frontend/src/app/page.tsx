@@ -479,12 +479,47 @@ const handleSubmit = async (e: FormEvent) => {
   const reader = response.body.getReader();
   const decoder = new TextDecoder();
 
+  const AGENT_ORDER = ["researcher", "analyst", "report_writer"];
+  // Agents whose LLM output is streamed as "delta" events before their final "update"
+  const STREAMED_TYPES: Record<string, AgentOutput['type']> = {
+    researcher: 'research_data',
+    report_writer: 'report',
+  };
+
+  const upsertOutput = (newOutput: AgentOutput) => {
+    setOutputs(prev => {
+      const filtered = prev.filter(out => out.agent !== newOutput.agent);
+      const updated = [...filtered, newOutput];
+      return updated.sort((a, b) => AGENT_ORDER.indexOf(a.agent) - AGENT_ORDER.indexOf(b.agent));
+    });
+
+    setExpandedMap(prev => ({
+      ...prev,
+      [newOutput.agent]: true,
+    }));
+  };
+
+  const appendDelta = (agent: string, type: AgentOutput['type'], delta: string) => {
+    setOutputs(prev => {
+      const current = prev.find(out => out.agent === agent);
+      const filtered = prev.filter(out => out.agent !== agent);
+      const updated = [...filtered, { agent, type, content: (current?.content ?? "") + delta }];
+      return updated.sort((a, b) => AGENT_ORDER.indexOf(a.agent) - AGENT_ORDER.indexOf(b.agent));
+    });
+
+    setExpandedMap(prev => (prev[agent] ? prev : { ...prev, [agent]: true }));
+  };
+
+  let buffer = "";
   while (true) {
     const { done, value } = await reader.read();
     if (done) break;
 
-    const chunk = decoder.decode(value, { stream: true });
-    const eventLines = chunk.split("\n\n").filter(line => line.startsWith("event:"));
+    // An event can straddle two reads; keep the trailing partial frame for the next one
+    buffer += decoder.decode(value, { stream: true });
+    const frames = buffer.split("\n\n");
+    buffer = frames.pop() ?? "";
+    const eventLines = frames.filter(line => line.startsWith("event:"));
 
     for (const line of eventLines) {
       const eventType = line.match(/event: (\w+)/)?.[1];
@@ -499,23 +534,6 @@ const handleSubmit = async (e: FormEvent) => {
             const [agent, agentData] = Object.entries(data)[0] as [string, AgentData];
             console.log("Agent:", agent, "AgentData:", agentData);
 
-            const upsertOutput = (newOutput: AgentOutput) => {
-              setOutputs(prev => {
-                const AGENT_ORDER = ["researcher", "analyst", "report_writer"];
-                const filtered = prev.filter(out => out.agent !== newOutput.agent);
-                const updated = [...filtered, newOutput];
-                return updated.sort((a, b) => AGENT_ORDER.indexOf(a.agent) - AGENT_ORDER.indexOf(b.agent));
-              });
-
-              setExpandedMap(prev => ({
-                ...prev,
-                [newOutput.agent]: true,
-              }));
-            };
-
-            
-
-
             if (agentData.research_data) {
               upsertOutput(normalizeOutput(agent, 'research_data', agentData.research_data));
             } else if (agentData.analysis) {
@@ -523,6 +541,13 @@ const handleSubmit = async (e: FormEvent) => {
             } else if (agentData.report) {
               upsertOutput(normalizeOutput(agent, 'report', agentData.report));
             }
+          } else if (eventType === "delta") {
+            // Live LLM tokens; the agent's final "update" replaces the accumulated text
+            const { node, delta } = data as { node: string; delta: string };
+            const type = STREAMED_TYPES[node];
+            if (type) {
+              appendDelta(node, type, delta);
+            }
           } else if (eventType === "error") {
             setOutputs(prev => [...prev, {
               agent: 'error',